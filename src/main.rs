@@ -1,13 +1,15 @@
 use std::collections::HashMap;
 use std::fs::{self, File};
-use std::io::{BufRead, BufReader};
+use std::io::{BufRead, BufReader, Read};
 use std::path::{Path, PathBuf};
-use std::process::Command;
+use std::process::{Command, Stdio};
 use std::sync::OnceLock;
 
+use aho_corasick::AhoCorasick;
 use chrono::{DateTime, FixedOffset};
 use clap::Parser;
-use serde::Deserialize;
+use memmap2::Mmap;
+use serde::{Deserialize, Serialize};
 
 // ─── Constants ──────────────────────────────────────────────────────
 
@@ -58,7 +60,7 @@ struct IndexMatch {
     created: String,
     modified: String,
     message_count: u64,
-    matched_field: String,
+    matched_field: &'static str,
     score: f64,
 }
 
@@ -108,17 +110,87 @@ struct OpenClawSessionMeta {
     timestamp: String,
 }
 
+/// On-disk cache of OpenClaw session metadata, keyed by session ID.
+/// Entries are invalidated when the file's (mtime, size) changes.
+#[derive(Deserialize, Serialize, Default)]
+struct MetaCache {
+    #[serde(default)]
+    entries: HashMap<String, CachedSessionMeta>,
+}
+
+#[derive(Deserialize, Serialize, Clone)]
+struct CachedSessionMeta {
+    mtime_ns: u64,
+    size: u64,
+    cwd: String,
+    timestamp: String,
+}
+
+/// A single line of a session JSONL file, covering only the fields the
+/// search paths actually read. Deserializing into this instead of a
+/// `serde_json::Value` tree skips map allocation for fields we never touch.
+#[derive(Deserialize, Default)]
+#[serde(rename_all = "camelCase", default)]
+struct SessionRecord {
+    #[serde(rename = "type")]
+    record_type: String,
+    session_id: String,
+    timestamp: String,
+    cwd: String,
+    message: Option<MessageBody>,
+}
+
+#[derive(Deserialize, Default)]
+#[serde(default)]
+struct MessageBody {
+    role: String,
+    content: Option<MessageContent>,
+}
+
+/// Message content is either a plain string or an array of content blocks
+#[derive(Deserialize)]
+#[serde(untagged)]
+enum MessageContent {
+    Text(String),
+    Blocks(Vec<ContentBlock>),
+    Other(serde_json::Value),
+}
+
+#[derive(Deserialize, Default)]
+#[serde(default)]
+struct ContentBlock {
+    #[serde(rename = "type")]
+    block_type: String,
+    text: String,
+    content: Option<serde_json::Value>,
+}
+
 // ─── Helpers ────────────────────────────────────────────────────────
 
+/// Home directory, resolved once — dirs::home_dir re-reads the environment
+/// on every call and format_project_path runs once per printed result
+static HOME_DIR: OnceLock<Option<PathBuf>> = OnceLock::new();
+static HOME_DIR_STR: OnceLock<Option<String>> = OnceLock::new();
+
+fn home_dir() -> Option<&'static Path> {
+    HOME_DIR.get_or_init(dirs::home_dir).as_deref()
+}
+
+fn home_dir_str() -> Option<&'static str> {
+    HOME_DIR_STR
+        .get_or_init(|| home_dir().map(|p| p.to_string_lossy().into_owned()))
+        .as_deref()
+}
+
 fn claude_projects_dir() -> PathBuf {
-    dirs::home_dir()
+    home_dir()
         .expect("Cannot determine home directory")
         .join(".claude")
         .join("projects")
 }
 
 fn openclaw_sessions_dir(agent: &str) -> PathBuf {
-    dirs::home_dir()
+    home_dir()
         .expect("Cannot determine home directory")
         .join(".openclaw")
         .join("agents")
@@ -126,10 +198,37 @@ fn openclaw_sessions_dir(agent: &str) -> PathBuf {
         .join("sessions")
 }
 
+/// Slice-format a well-formed "YYYY-MM-DDTHH:MM..." prefix without running
+/// a date parser. The output keeps the timestamp's own offset, exactly as
+/// the chrono path does.
+fn format_iso_prefix(s: &str) -> Option<String> {
+    let b = s.as_bytes();
+    if b.len() < 16 {
+        return None;
+    }
+    const DIGIT_POSITIONS: [usize; 12] = [0, 1, 2, 3, 5, 6, 8, 9, 11, 12, 14, 15];
+    if !DIGIT_POSITIONS.iter().all(|&i| b[i].is_ascii_digit()) {
+        return None;
+    }
+    if b[4] != b'-' || b[7] != b'-' || (b[10] != b'T' && b[10] != b' ') || b[13] != b':' {
+        return None;
+    }
+    let mut out = String::with_capacity(16);
+    out.push_str(&s[..10]);
+    out.push(' ');
+    out.push_str(&s[11..16]);
+    Some(out)
+}
+
 fn format_date(iso_str: &str) -> String {
     if iso_str.is_empty() {
         return "unknown".to_string();
     }
+    // Fast path: the displayed "YYYY-MM-DD HH:MM" is a fixed slice of any
+    // well-formed ISO timestamp, no parsing required
+    if let Some(formatted) = format_iso_prefix(iso_str) {
+        return formatted;
+    }
     if let Ok(dt) = DateTime::parse_from_rfc3339(iso_str) {
         return dt.format("%Y-%m-%d %H:%M").to_string();
     }
@@ -143,11 +242,10 @@ fn format_date(iso_str: &str) -> String {
 }
 
 fn format_project_path(path: &str) -> String {
-    if let Some(home) = dirs::home_dir() {
-        let home_str = home.to_string_lossy();
-        if let Some(rest) = path.strip_prefix(home_str.as_ref()) {
-            return format!("~{rest}");
-        }
+    if let Some(home) = home_dir_str()
+        && let Some(rest) = path.strip_prefix(home)
+    {
+        return format!("~{rest}");
     }
     path.to_string()
 }
@@ -196,58 +294,178 @@ fn load_index(path: &Path) -> (String, Vec<SessionIndexEntry>) {
     (original_path, index.entries)
 }
 
-fn score_index_entry(entry: &SessionIndexEntry, query_terms: &[&str]) -> (f64, String) {
-    let fields: &[(&str, &str, f64)] = &[
-        ("summary", &entry.summary, 3.0),
-        ("firstPrompt", &entry.first_prompt, 2.0),
-        ("gitBranch", &entry.git_branch, 1.0),
-        ("projectPath", &entry.project_path, 1.0),
+/// Lowercased query terms plus a multi-pattern automaton over them, built
+/// once per search so each text is scanned a single time regardless of how
+/// many terms the query has
+struct QueryMatcher {
+    /// The whole query phrase, lowercased once (preferred for snippets)
+    phrase_lower: String,
+    terms_lower: Vec<String>,
+    automaton: Option<AhoCorasick>,
+    /// Byte-level ASCII-case-insensitive automaton, used to reject whole
+    /// files without decoding them. Only built for all-ASCII queries.
+    ascii_automaton: Option<AhoCorasick>,
+}
+
+impl QueryMatcher {
+    fn new(query: &str) -> Self {
+        let terms_lower: Vec<String> = query.split_whitespace().map(|s| s.to_lowercase()).collect();
+        // Construction only fails on pathological pattern sets; fall back to
+        // per-term contains scans in that case
+        let automaton = AhoCorasick::new(&terms_lower).ok();
+        let ascii_automaton = if terms_lower.iter().all(|t| t.is_ascii()) {
+            AhoCorasick::builder()
+                .ascii_case_insensitive(true)
+                .build(&terms_lower)
+                .ok()
+        } else {
+            None
+        };
+        QueryMatcher {
+            phrase_lower: query.to_lowercase(),
+            terms_lower,
+            automaton,
+            ascii_automaton,
+        }
+    }
+
+    /// Conservative check over raw bytes: `false` means no line in `bytes`
+    /// can satisfy the query, `true` means "maybe". Non-ASCII queries always
+    /// return `true` since ASCII case folding would be unsound for them.
+    fn may_contain_all_terms(&self, bytes: &[u8]) -> bool {
+        let Some(ac) = &self.ascii_automaton else {
+            return true;
+        };
+        let mut hits = vec![false; self.terms_lower.len()];
+        let mut remaining = self.terms_lower.len();
+        for m in ac.find_overlapping_iter(bytes) {
+            let i = m.pattern().as_usize();
+            if !hits[i] {
+                hits[i] = true;
+                remaining -= 1;
+                if remaining == 0 {
+                    return true;
+                }
+            }
+        }
+        remaining == 0
+    }
+
+    fn term_count(&self) -> usize {
+        self.terms_lower.len()
+    }
+
+    fn terms(&self) -> &[String] {
+        &self.terms_lower
+    }
+
+    /// True when every query term occurs in `text_lower`. One automaton
+    /// scan replaces a contains pass per term, and the scan stops as soon
+    /// as the last outstanding term is seen.
+    fn all_terms_in(&self, text_lower: &str) -> bool {
+        match &self.automaton {
+            Some(ac) => {
+                let mut hits = vec![false; self.terms_lower.len()];
+                let mut remaining = self.terms_lower.len();
+                for m in ac.find_overlapping_iter(text_lower) {
+                    let i = m.pattern().as_usize();
+                    if !hits[i] {
+                        hits[i] = true;
+                        remaining -= 1;
+                        if remaining == 0 {
+                            return true;
+                        }
+                    }
+                }
+                remaining == 0
+            }
+            None => self
+                .terms_lower
+                .iter()
+                .all(|t| text_lower.contains(t.as_str())),
+        }
+    }
+
+    /// Mark which terms occur in `text_lower` (one flag per term index)
+    fn mark_term_hits(&self, text_lower: &str, hits: &mut [bool]) {
+        match &self.automaton {
+            Some(ac) => {
+                // Overlapping iteration so no term is shadowed by another
+                // (e.g. "rust" inside "trust")
+                for m in ac.find_overlapping_iter(text_lower) {
+                    hits[m.pattern().as_usize()] = true;
+                }
+            }
+            None => {
+                for (i, term) in self.terms_lower.iter().enumerate() {
+                    if text_lower.contains(term.as_str()) {
+                        hits[i] = true;
+                    }
+                }
+            }
+        }
+    }
+}
+
+fn score_index_entry(entry: &SessionIndexEntry, matcher: &QueryMatcher) -> (f64, &'static str) {
+    // Lowercase each field once up front rather than once per query term
+    let fields_lower: [(&'static str, String, f64); 4] = [
+        ("summary", entry.summary.to_lowercase(), 3.0),
+        ("firstPrompt", entry.first_prompt.to_lowercase(), 2.0),
+        ("gitBranch", entry.git_branch.to_lowercase(), 1.0),
+        ("projectPath", entry.project_path.to_lowercase(), 1.0),
     ];
 
+    // AND semantics: bail on the first term that appears in no field.
+    // Most entries fail here and never reach the weight bookkeeping below.
+    for term in matcher.terms() {
+        if !fields_lower
+            .iter()
+            .any(|(_, value_lower, _)| value_lower.contains(term.as_str()))
+        {
+            return (0.0, "");
+        }
+    }
+
     let mut total_score = 0.0;
-    let mut best_field = String::new();
+    let mut best_field = "";
     let mut best_field_score = 0.0;
+    let mut field_hits = vec![false; matcher.term_count()];
 
-    for term in query_terms {
-        let term_lower = term.to_lowercase();
-        let mut term_found = false;
+    for (field_name, field_value_lower, weight) in &fields_lower {
+        field_hits.fill(false);
+        matcher.mark_term_hits(field_value_lower, &mut field_hits);
 
-        for &(field_name, field_value, weight) in fields {
-            if field_value.to_lowercase().contains(&term_lower) {
-                term_found = true;
+        for hit in &field_hits {
+            if *hit {
                 total_score += weight;
-                if weight > best_field_score {
-                    best_field_score = weight;
-                    best_field = field_name.to_string();
+                if *weight > best_field_score {
+                    best_field_score = *weight;
+                    best_field = field_name;
                 }
             }
         }
-
-        if !term_found {
-            return (0.0, String::new());
-        }
     }
 
     (total_score, best_field)
 }
 
 fn search_index(query: &str, project_filter: Option<&str>, base: &Path) -> Vec<IndexMatch> {
-    let query_terms: Vec<&str> = query.split_whitespace().collect();
+    let matcher = QueryMatcher::new(query);
+    let filter_lower = project_filter.map(|f| f.to_lowercase());
     let mut matches = Vec::new();
 
     for index_path in find_all_index_files(base) {
         let (original_path, entries) = load_index(&index_path);
 
-        if let Some(filter) = project_filter
-            && !original_path
-                .to_lowercase()
-                .contains(&filter.to_lowercase())
+        if let Some(filter) = &filter_lower
+            && !original_path.to_lowercase().contains(filter)
         {
             continue;
         }
 
         for entry in &entries {
-            let (score, matched_field) = score_index_entry(entry, &query_terms);
+            let (score, matched_field) = score_index_entry(entry, &matcher);
             if score > 0.0 {
                 matches.push(IndexMatch {
                     session_id: entry.session_id.clone(),
@@ -269,11 +487,14 @@ fn search_index(query: &str, project_filter: Option<&str>, base: &Path) -> Vec<I
         }
     }
 
-    matches.sort_by(|a, b| {
+    // Unstable sort is fine here: session_id breaks any (score, modified)
+    // tie, so the ordering is total and deterministic without relying on
+    // insertion order. total_cmp avoids the partial_cmp Option dance.
+    matches.sort_unstable_by(|a, b| {
         b.score
-            .partial_cmp(&a.score)
-            .unwrap_or(std::cmp::Ordering::Equal)
+            .total_cmp(&a.score)
             .then_with(|| b.modified.cmp(&a.modified))
+            .then_with(|| a.session_id.cmp(&b.session_id))
     });
 
     matches
@@ -281,33 +502,40 @@ fn search_index(query: &str, project_filter: Option<&str>, base: &Path) -> Vec<I
 
 // ─── Deep Search ────────────────────────────────────────────────────
 
-fn resolve_search_path(base: &Path, project_filter: Option<&str>) -> PathBuf {
+/// Directories to search: every project dir matching the filter, or the
+/// base dir when no filter is given (or nothing matches). Narrowing the
+/// walk to matching projects saves more than any per-file speedup.
+fn resolve_search_paths(base: &Path, project_filter: Option<&str>) -> Vec<PathBuf> {
     if let Some(filter) = project_filter {
         let filter_lower = filter.to_lowercase();
         if let Ok(entries) = fs::read_dir(base) {
-            for entry in entries.flatten() {
-                if entry.path().is_dir()
-                    && entry
-                        .file_name()
-                        .to_string_lossy()
-                        .to_lowercase()
-                        .contains(&filter_lower)
-                {
-                    return entry.path();
-                }
+            let mut paths: Vec<PathBuf> = entries
+                .flatten()
+                .filter(|e| {
+                    e.path().is_dir()
+                        && e.file_name()
+                            .to_string_lossy()
+                            .to_lowercase()
+                            .contains(&filter_lower)
+                })
+                .map(|e| e.path())
+                .collect();
+            if !paths.is_empty() {
+                paths.sort();
+                return paths;
             }
         }
     }
-    base.to_path_buf()
+    vec![base.to_path_buf()]
 }
 
 /// Extract text from Claude Code message format
 /// Record has: {"type": "user"|"assistant", "message": {"content": ...}}
-fn extract_text_claude(value: &serde_json::Value) -> String {
-    let Some(message) = value.get("message") else {
+fn extract_text_claude(record: &SessionRecord) -> String {
+    let Some(message) = &record.message else {
         return String::new();
     };
-    let Some(content) = message.get("content") else {
+    let Some(content) = &message.content else {
         return String::new();
     };
 
@@ -316,18 +544,14 @@ fn extract_text_claude(value: &serde_json::Value) -> String {
 
 /// Extract text from OpenClaw message format
 /// Record has: {"type": "message", "message": {"role": "user"|"assistant", "content": ...}}
-fn extract_text_openclaw(value: &serde_json::Value) -> (String, String) {
-    let Some(message) = value.get("message") else {
+fn extract_text_openclaw(record: &SessionRecord) -> (String, String) {
+    let Some(message) = &record.message else {
         return (String::new(), String::new());
     };
 
-    let role = message
-        .get("role")
-        .and_then(|r| r.as_str())
-        .unwrap_or("")
-        .to_string();
+    let role = message.role.clone();
 
-    let Some(content) = message.get("content") else {
+    let Some(content) = &message.content else {
         return (role, String::new());
     };
 
@@ -335,31 +559,37 @@ fn extract_text_openclaw(value: &serde_json::Value) -> (String, String) {
 }
 
 /// Shared content array extraction
-fn extract_content_array(content: &serde_json::Value) -> String {
+fn extract_content_array(content: &MessageContent) -> String {
     match content {
-        serde_json::Value::String(s) => s.clone(),
-        serde_json::Value::Array(arr) => {
-            let mut texts = Vec::new();
-            for item in arr {
-                if let Some(t) = item.get("type").and_then(|t| t.as_str()) {
-                    match t {
-                        "text" => {
-                            if let Some(text) = item.get("text").and_then(|t| t.as_str()) {
-                                texts.push(text.to_string());
+        MessageContent::Text(s) => s.clone(),
+        MessageContent::Blocks(blocks) => {
+            // Accumulate into one growing buffer instead of collecting
+            // per-block Strings and joining them afterwards
+            let mut text = String::new();
+            for block in blocks {
+                match block.block_type.as_str() {
+                    "text" => {
+                        if !block.text.is_empty() {
+                            if !text.is_empty() {
+                                text.push(' ');
                             }
+                            text.push_str(&block.text);
                         }
-                        "tool_result" => {
-                            if let Some(c) = item.get("content") {
-                                texts.push(c.to_string());
+                    }
+                    "tool_result" => {
+                        if let Some(c) = &block.content {
+                            if !text.is_empty() {
+                                text.push(' ');
                             }
+                            text.push_str(&c.to_string());
                         }
-                        _ => {}
                     }
+                    _ => {}
                 }
             }
-            texts.join(" ")
+            text
         }
-        _ => content.to_string(),
+        MessageContent::Other(v) => v.to_string(),
     }
 }
 
@@ -385,15 +615,21 @@ fn ceil_char_boundary(s: &str, index: usize) -> usize {
     i
 }
 
-fn get_snippet(text: &str, query: &str, context_chars: usize) -> String {
-    let text_lower = text.to_lowercase();
-    let query_lower = query.to_lowercase();
-
-    let mut idx = text_lower.find(&query_lower);
+/// Build a snippet around the first query hit. Takes the already-lowercased
+/// text so callers that lowered it for matching don't pay for it twice.
+fn get_snippet(
+    text: &str,
+    text_lower: &str,
+    matcher: &QueryMatcher,
+    context_chars: usize,
+) -> String {
+    let mut idx = text_lower.find(&matcher.phrase_lower);
+    let mut match_len = matcher.phrase_lower.len();
     if idx.is_none() {
-        for term in query.split_whitespace() {
-            idx = text_lower.find(&term.to_lowercase());
-            if idx.is_some() {
+        for term in &matcher.terms_lower {
+            if let Some(i) = text_lower.find(term.as_str()) {
+                idx = Some(i);
+                match_len = term.len();
                 break;
             }
         }
@@ -405,7 +641,7 @@ fn get_snippet(text: &str, query: &str, context_chars: usize) -> String {
     };
 
     let start = idx.saturating_sub(context_chars);
-    let end = (idx + query.len() + context_chars).min(text.len());
+    let end = (idx + match_len + context_chars).min(text.len());
 
     // Ensure we don't split multi-byte chars
     let start = floor_char_boundary(text, start);
@@ -436,16 +672,19 @@ fn build_index_lookup(base: &Path) -> HashMap<String, SessionIndexEntry> {
     lookup
 }
 
-/// Parse a single ripgrep output line: /path/to/file.jsonl:LINE_NUM:json_content
-fn parse_rg_line(line: &str) -> Option<(PathBuf, serde_json::Value)> {
-    // Split on first two colons
-    let first_colon = line.find(':')?;
-    let path = PathBuf::from(&line[..first_colon]);
-    let rest = &line[first_colon + 1..];
-    let second_colon = rest.find(':')?;
-    let json_str = &rest[second_colon + 1..];
-    let value = serde_json::from_str(json_str).ok()?;
-    Some((path, value))
+/// Parse a single `rg --json` event, returning the matched file path and the
+/// JSON-decoded session record for `match` events. Other event types (begin,
+/// end, context, summary) are skipped, as are matches on non-UTF8 lines.
+fn parse_rg_json_event(event: &str) -> Option<(PathBuf, SessionRecord)> {
+    let event: serde_json::Value = serde_json::from_str(event).ok()?;
+    if event.get("type").and_then(|t| t.as_str()) != Some("match") {
+        return None;
+    }
+    let data = event.get("data")?;
+    let path = PathBuf::from(data.get("path")?.get("text")?.as_str()?);
+    let line_text = data.get("lines")?.get("text")?.as_str()?;
+    let record = serde_json::from_str(line_text).ok()?;
+    Some((path, record))
 }
 
 /// Extract session ID from file path (OpenClaw: filename is session ID)
@@ -456,14 +695,117 @@ fn session_id_from_path(path: &Path) -> String {
         .to_string()
 }
 
-/// Pre-load OpenClaw session metadata by reading session headers from all JSONL files
-fn load_openclaw_session_metadata(base: &Path) -> HashMap<String, OpenClawSessionMeta> {
-    let mut metadata = HashMap::new();
+/// Upper bound on how many bytes to read when looking for a session header
+const SESSION_HEADER_READ_LIMIT: u64 = 65536;
+
+/// Read the first line of a file without loading the whole file into memory.
+/// Session files can be many megabytes; the header is always line one.
+fn read_first_line(path: &Path) -> Option<String> {
+    let file = File::open(path).ok()?;
+    let mut reader = BufReader::new(file.take(SESSION_HEADER_READ_LIMIT));
+    let mut line = String::new();
+    reader.read_line(&mut line).ok()?;
+    if line.is_empty() {
+        return None;
+    }
+    Some(line)
+}
+
+/// Parse the session header (first line) of a single JSONL file
+fn read_session_header(path: &Path) -> Option<OpenClawSessionMeta> {
+    let first_line = read_first_line(path)?;
+    let record: SessionRecord = serde_json::from_str(first_line.trim_end()).ok()?;
+    if record.record_type != "session" {
+        return None;
+    }
+    Some(OpenClawSessionMeta {
+        cwd: record.cwd,
+        timestamp: record.timestamp,
+    })
+}
+
+/// Read session headers for many files, spreading the I/O-bound reads
+/// across threads so per-file disk latency overlaps
+fn read_session_headers(paths: &[(String, PathBuf)]) -> HashMap<String, OpenClawSessionMeta> {
+    let workers = std::thread::available_parallelism()
+        .map(|n| n.get())
+        .unwrap_or(1)
+        .min(paths.len());
+
+    if workers <= 1 {
+        return paths
+            .iter()
+            .filter_map(|(id, path)| read_session_header(path).map(|m| (id.clone(), m)))
+            .collect();
+    }
+
+    let chunk_size = paths.len().div_ceil(workers);
+    std::thread::scope(|scope| {
+        let handles: Vec<_> = paths
+            .chunks(chunk_size)
+            .map(|chunk| {
+                scope.spawn(move || {
+                    chunk
+                        .iter()
+                        .filter_map(|(id, path)| read_session_header(path).map(|m| (id.clone(), m)))
+                        .collect::<Vec<_>>()
+                })
+            })
+            .collect();
+        handles
+            .into_iter()
+            .flat_map(|h| h.join().unwrap_or_default())
+            .collect()
+    })
+}
+
+/// Name of the metadata cache file kept next to the session files
+const META_CACHE_FILE: &str = ".search-sessions-cache.json";
 
+fn load_meta_cache(path: &Path) -> MetaCache {
+    fs::read_to_string(path)
+        .ok()
+        .and_then(|data| serde_json::from_str(&data).ok())
+        .unwrap_or_default()
+}
+
+/// Best-effort atomic rewrite of the metadata cache (temp file + rename).
+/// Failures are ignored: the cache is purely an optimization.
+fn save_meta_cache(path: &Path, cache: &MetaCache) {
+    let Ok(data) = serde_json::to_string(cache) else {
+        return;
+    };
+    let tmp_path = path.with_extension("json.tmp");
+    if fs::write(&tmp_path, data).is_ok() && fs::rename(&tmp_path, path).is_err() {
+        let _ = fs::remove_file(&tmp_path);
+    }
+}
+
+/// Nanoseconds since the epoch of a file's mtime, for cache validation
+fn mtime_ns(meta: &fs::Metadata) -> u64 {
+    meta.modified()
+        .ok()
+        .and_then(|t| t.duration_since(std::time::UNIX_EPOCH).ok())
+        .map(|d| d.as_nanos() as u64)
+        .unwrap_or(0)
+}
+
+/// Pre-load OpenClaw session metadata by reading session headers from all
+/// JSONL files. Headers for unchanged files (same mtime and size) are served
+/// from the on-disk cache; only new or modified sessions are re-read.
+fn load_openclaw_session_metadata(base: &Path) -> HashMap<String, OpenClawSessionMeta> {
     let Ok(entries) = fs::read_dir(base) else {
-        return metadata;
+        return HashMap::new();
     };
 
+    let cache_path = base.join(META_CACHE_FILE);
+    let cache = load_meta_cache(&cache_path);
+    let mut new_cache = MetaCache::default();
+
+    let mut metadata = HashMap::new();
+    let mut to_read = Vec::new();
+    let mut stats: HashMap<String, (u64, u64)> = HashMap::new();
+
     for entry in entries.flatten() {
         let path = entry.path();
         if path.extension().is_none_or(|e| e != "jsonl") {
@@ -479,34 +821,51 @@ fn load_openclaw_session_metadata(base: &Path) -> HashMap<String, OpenClawSessio
             continue;
         }
 
-        // Read first line to get session header
-        if let Ok(content) = fs::read_to_string(&path)
-            && let Some(first_line) = content.lines().next()
-            && let Ok(record) = serde_json::from_str::<serde_json::Value>(first_line)
-            && record.get("type").and_then(|t| t.as_str()) == Some("session")
+        let Ok(file_meta) = entry.metadata() else {
+            continue;
+        };
+        let (mtime, size) = (mtime_ns(&file_meta), file_meta.len());
+
+        if let Some(cached) = cache.entries.get(&session_id)
+            && cached.mtime_ns == mtime
+            && cached.size == size
         {
-            let cwd = record
-                .get("cwd")
-                .and_then(|c| c.as_str())
-                .unwrap_or("")
-                .to_string();
-            let timestamp = record
-                .get("timestamp")
-                .and_then(|t| t.as_str())
-                .unwrap_or("")
-                .to_string();
-            metadata.insert(session_id, OpenClawSessionMeta { cwd, timestamp });
+            metadata.insert(
+                session_id.clone(),
+                OpenClawSessionMeta {
+                    cwd: cached.cwd.clone(),
+                    timestamp: cached.timestamp.clone(),
+                },
+            );
+            new_cache.entries.insert(session_id, cached.clone());
+            continue;
         }
+
+        stats.insert(session_id.clone(), (mtime, size));
+        to_read.push((session_id, path));
     }
 
-    metadata
-}
+    for (session_id, meta) in read_session_headers(&to_read) {
+        if let Some(&(mtime, size)) = stats.get(&session_id) {
+            new_cache.entries.insert(
+                session_id.clone(),
+                CachedSessionMeta {
+                    mtime_ns: mtime,
+                    size,
+                    cwd: meta.cwd.clone(),
+                    timestamp: meta.timestamp.clone(),
+                },
+            );
+        }
+        metadata.insert(session_id, meta);
+    }
 
-/// Check if all query terms appear in the lowercased text
-fn matches_all_terms(text_lower: &str, query_terms_lower: &[String]) -> bool {
-    query_terms_lower
-        .iter()
-        .all(|term| text_lower.contains(term))
+    // Rewrite only when something changed (new reads or dropped sessions)
+    if !to_read.is_empty() || new_cache.entries.len() != cache.entries.len() {
+        save_meta_cache(&cache_path, &new_cache);
+    }
+
+    metadata
 }
 
 // ─── Ripgrep Detection & Fallback ───────────────────────────────────
@@ -525,6 +884,14 @@ fn is_ripgrep_available() -> bool {
     })
 }
 
+/// Thread count to pass to ripgrep (all available cores)
+fn rg_thread_count() -> String {
+    std::thread::available_parallelism()
+        .map(|n| n.get())
+        .unwrap_or(1)
+        .to_string()
+}
+
 /// Print a one-time warning about ripgrep not being available
 static RIPGREP_WARNING_SHOWN: OnceLock<()> = OnceLock::new();
 
@@ -587,54 +954,92 @@ fn find_jsonl_files(base: &Path, exclude_subagents: bool, exclude_deleted: bool)
     files
 }
 
+/// A session file's contents, memory-mapped when possible
+enum FileBuf {
+    Mapped(Mmap),
+    Owned(Vec<u8>),
+}
+
+impl std::ops::Deref for FileBuf {
+    type Target = [u8];
+
+    fn deref(&self) -> &[u8] {
+        match self {
+            FileBuf::Mapped(m) => m,
+            FileBuf::Owned(v) => v,
+        }
+    }
+}
+
+/// Memory-map a session file for scanning, falling back to a plain read
+/// when mapping fails (e.g. zero-length files)
+fn map_session_file(path: &Path) -> Option<FileBuf> {
+    let file = File::open(path).ok()?;
+    // SAFETY: the mapping is read-only; a concurrent append can at worst
+    // tear the final line, which the per-line JSON parse rejects
+    match unsafe { Mmap::map(&file) } {
+        Ok(m) => Some(FileBuf::Mapped(m)),
+        Err(_) => fs::read(path).ok().map(FileBuf::Owned),
+    }
+}
+
 /// Pure Rust deep search for Claude Code sessions (fallback when ripgrep unavailable)
 fn search_deep_claude_rust(
     query: &str,
     limit: usize,
     project_filter: Option<&str>,
     base: &Path,
+    index_lookup: &HashMap<String, SessionIndexEntry>,
 ) -> Vec<DeepMatch> {
     warn_ripgrep_not_available();
 
-    let search_path = resolve_search_path(base, project_filter);
-    let query_terms_lower: Vec<String> =
-        query.split_whitespace().map(|s| s.to_lowercase()).collect();
-    let index_lookup = build_index_lookup(base);
+    let matcher = QueryMatcher::new(query);
 
-    let jsonl_files = find_jsonl_files(&search_path, true, false);
+    let jsonl_files: Vec<PathBuf> = resolve_search_paths(base, project_filter)
+        .iter()
+        .flat_map(|p| find_jsonl_files(p, true, false))
+        .collect();
 
     let mut matches = Vec::new();
     let mut seen_sessions: HashMap<String, usize> = HashMap::new();
 
     'outer: for file_path in jsonl_files {
-        let Ok(file) = File::open(&file_path) else {
+        let Some(buf) = map_session_file(&file_path) else {
             continue;
         };
-        let reader = BufReader::new(file);
 
-        for line in reader.lines() {
+        // Whole-file rejection: if some term appears nowhere in the file,
+        // no line in it can match
+        if !matcher.may_contain_all_terms(&buf) {
+            continue;
+        }
+
+        for raw_line in buf.split(|&b| b == b'\n') {
             if matches.len() >= limit {
                 break 'outer;
             }
 
-            let Ok(line) = line else {
+            let Ok(line) = std::str::from_utf8(raw_line) else {
                 continue;
             };
 
-            let Ok(record) = serde_json::from_str::<serde_json::Value>(&line) else {
+            // Cheap substring prefilter on the raw line: only lines that can
+            // possibly match get JSON-decoded (mirrors what ripgrep does)
+            let line_lower = line.to_lowercase();
+            if !matcher.all_terms_in(&line_lower) {
+                continue;
+            }
+
+            let Ok(record) = serde_json::from_str::<SessionRecord>(line) else {
                 continue;
             };
 
-            let record_type = record.get("type").and_then(|t| t.as_str()).unwrap_or("");
+            let record_type = record.record_type.as_str();
             if record_type != "user" && record_type != "assistant" {
                 continue;
             }
 
-            let session_id = record
-                .get("sessionId")
-                .and_then(|s| s.as_str())
-                .unwrap_or("")
-                .to_string();
+            let session_id = record.session_id.clone();
 
             let count = seen_sessions.entry(session_id.clone()).or_insert(0);
             if *count >= MAX_MATCHES_PER_SESSION {
@@ -647,26 +1052,22 @@ fn search_deep_claude_rust(
             }
 
             let text_lower = text.to_lowercase();
-            if !matches_all_terms(&text_lower, &query_terms_lower) {
+            if !matcher.all_terms_in(&text_lower) {
                 continue;
             }
 
-            let snippet = get_snippet(&text, query, 80);
+            let snippet = get_snippet(&text, &text_lower, &matcher, 80);
 
             let index_entry = index_lookup.get(&session_id);
-            let project_path = record
-                .get("cwd")
-                .and_then(|c| c.as_str())
-                .filter(|s| !s.is_empty())
-                .map(String::from)
-                .or_else(|| index_entry.map(|e| e.project_path.clone()))
-                .unwrap_or_else(|| "unknown".to_string());
+            let project_path = if record.cwd.is_empty() {
+                index_entry
+                    .map(|e| e.project_path.clone())
+                    .unwrap_or_else(|| "unknown".to_string())
+            } else {
+                record.cwd.clone()
+            };
 
-            let timestamp = record
-                .get("timestamp")
-                .and_then(|t| t.as_str())
-                .unwrap_or("")
-                .to_string();
+            let timestamp = record.timestamp.clone();
 
             matches.push(DeepMatch {
                 session_id: session_id.clone(),
@@ -686,39 +1087,56 @@ fn search_deep_claude_rust(
 }
 
 /// Pure Rust deep search for OpenClaw sessions (fallback when ripgrep unavailable)
-fn search_deep_openclaw_rust(query: &str, limit: usize, base: &Path) -> Vec<DeepMatch> {
+fn search_deep_openclaw_rust(
+    query: &str,
+    limit: usize,
+    base: &Path,
+    session_metadata: &HashMap<String, OpenClawSessionMeta>,
+) -> Vec<DeepMatch> {
     warn_ripgrep_not_available();
 
-    let query_terms_lower: Vec<String> =
-        query.split_whitespace().map(|s| s.to_lowercase()).collect();
-    let session_metadata = load_openclaw_session_metadata(base);
+    let matcher = QueryMatcher::new(query);
 
-    let jsonl_files = find_jsonl_files(base, false, true);
+    // Skip subagent runs: they have no session header of their own and
+    // duplicate content from the parent session
+    let jsonl_files = find_jsonl_files(base, true, true);
 
     let mut matches = Vec::new();
     let mut seen_sessions: HashMap<String, usize> = HashMap::new();
 
     'outer: for file_path in jsonl_files {
-        let Ok(file) = File::open(&file_path) else {
+        let Some(buf) = map_session_file(&file_path) else {
             continue;
         };
-        let reader = BufReader::new(file);
         let session_id = session_id_from_path(&file_path);
 
-        for line in reader.lines() {
+        // Whole-file rejection: if some term appears nowhere in the file,
+        // no line in it can match
+        if !matcher.may_contain_all_terms(&buf) {
+            continue;
+        }
+
+        for raw_line in buf.split(|&b| b == b'\n') {
             if matches.len() >= limit {
                 break 'outer;
             }
 
-            let Ok(line) = line else {
+            let Ok(line) = std::str::from_utf8(raw_line) else {
                 continue;
             };
 
-            let Ok(record) = serde_json::from_str::<serde_json::Value>(&line) else {
+            // Cheap substring prefilter on the raw line: only lines that can
+            // possibly match get JSON-decoded (mirrors what ripgrep does)
+            let line_lower = line.to_lowercase();
+            if !matcher.all_terms_in(&line_lower) {
+                continue;
+            }
+
+            let Ok(record) = serde_json::from_str::<SessionRecord>(line) else {
                 continue;
             };
 
-            let record_type = record.get("type").and_then(|t| t.as_str()).unwrap_or("");
+            let record_type = record.record_type.as_str();
             if record_type != "message" {
                 continue;
             }
@@ -734,23 +1152,20 @@ fn search_deep_openclaw_rust(query: &str, limit: usize, base: &Path) -> Vec<Deep
             }
 
             let text_lower = text.to_lowercase();
-            if !matches_all_terms(&text_lower, &query_terms_lower) {
+            if !matcher.all_terms_in(&text_lower) {
                 continue;
             }
 
-            let snippet = get_snippet(&text, query, 80);
+            let snippet = get_snippet(&text, &text_lower, &matcher, 80);
 
-            let timestamp = record
-                .get("timestamp")
-                .and_then(|t| t.as_str())
-                .filter(|s| !s.is_empty())
-                .map(String::from)
-                .or_else(|| {
-                    session_metadata
-                        .get(&session_id)
-                        .map(|m| m.timestamp.clone())
-                })
-                .unwrap_or_default();
+            let timestamp = if record.timestamp.is_empty() {
+                session_metadata
+                    .get(&session_id)
+                    .map(|m| m.timestamp.clone())
+                    .unwrap_or_default()
+            } else {
+                record.timestamp.clone()
+            };
 
             let project_path = session_metadata
                 .get(&session_id)
@@ -781,76 +1196,83 @@ fn search_deep_claude(
     project_filter: Option<&str>,
     base: &Path,
 ) -> Vec<DeepMatch> {
+    // The index lookup is shared with the Rust fallback so a failed rg
+    // spawn does not rebuild it
+    let index_lookup = build_index_lookup(base);
+
     // Check if ripgrep is available, fall back to pure Rust if not
     if !is_ripgrep_available() {
-        return search_deep_claude_rust(query, limit, project_filter, base);
+        return search_deep_claude_rust(query, limit, project_filter, base, &index_lookup);
     }
 
-    let search_path = resolve_search_path(base, project_filter);
-    // Pre-lowercase query terms to avoid repeated allocations
-    let query_terms_lower: Vec<String> =
-        query.split_whitespace().map(|s| s.to_lowercase()).collect();
-    let index_lookup = build_index_lookup(base);
+    let search_paths = resolve_search_paths(base, project_filter);
+    let matcher = QueryMatcher::new(query);
 
-    let output = Command::new("rg")
+    let child = Command::new("rg")
         .args([
-            "--no-heading",
-            "--line-number",
+            "--json",
             "--ignore-case",
-            "--glob",
-            "*.jsonl",
+            // A named type dispatches faster than a one-off glob
+            "--type-add",
+            "session:*.jsonl",
+            "--type",
+            "session",
             "--glob",
             "!**/subagents/**",
             "--glob",
             "!**/sessions-index.json",
+            "--threads",
+            &rg_thread_count(),
             query,
         ])
-        .arg(&search_path)
-        .output();
+        .args(&search_paths)
+        .stdout(Stdio::piped())
+        .stderr(Stdio::null())
+        .spawn();
 
-    let output = match output {
-        Ok(o) => o,
+    let mut child = match child {
+        Ok(c) => c,
         Err(e) => {
             // Fallback to Rust if ripgrep fails unexpectedly
             eprintln!("WARNING: Failed to run ripgrep: {e}. Using Rust fallback.");
-            return search_deep_claude_rust(query, limit, project_filter, base);
+            return search_deep_claude_rust(query, limit, project_filter, base, &index_lookup);
         }
     };
 
-    // rg returns exit code 1 for no matches, which is fine
-    if !output.status.success() && output.status.code() != Some(1) {
-        eprintln!(
-            "WARNING: ripgrep returned unexpected exit code: {:?}",
-            output.status.code()
-        );
-    }
-
-    let stdout = String::from_utf8_lossy(&output.stdout);
+    let Some(stdout) = child.stdout.take() else {
+        let _ = child.wait();
+        return search_deep_claude_rust(query, limit, project_filter, base, &index_lookup);
+    };
+    let reader = BufReader::new(stdout);
 
     let mut matches = Vec::new();
     let mut seen_sessions: HashMap<String, usize> = HashMap::new();
+    let mut killed = false;
 
-    for line in stdout.lines() {
+    for line in reader.lines() {
+        // Hit the limit: stop rg instead of draining its remaining output
         if matches.len() >= limit {
+            let _ = child.kill();
+            killed = true;
             break;
         }
 
-        let (_path, record) = match parse_rg_line(line) {
+        let Ok(line) = line else {
+            break;
+        };
+
+        let (_path, record) = match parse_rg_json_event(&line) {
             Some(r) => r,
             None => continue,
         };
 
-        let record_type = record.get("type").and_then(|t| t.as_str()).unwrap_or("");
+        let record_type = record.record_type.as_str();
 
         if record_type != "user" && record_type != "assistant" {
             continue;
         }
 
-        let session_id = record
-            .get("sessionId")
-            .and_then(|s| s.as_str())
-            .unwrap_or("")
-            .to_string();
+        let session_id = record.session_id.clone();
 
         let count = seen_sessions.entry(session_id.clone()).or_insert(0);
         if *count >= MAX_MATCHES_PER_SESSION {
@@ -864,26 +1286,22 @@ fn search_deep_claude(
 
         // Lowercase text once, then check all terms
         let text_lower = text.to_lowercase();
-        if !matches_all_terms(&text_lower, &query_terms_lower) {
+        if !matcher.all_terms_in(&text_lower) {
             continue;
         }
 
-        let snippet = get_snippet(&text, query, 80);
+        let snippet = get_snippet(&text, &text_lower, &matcher, 80);
 
         let index_entry = index_lookup.get(&session_id);
-        let project_path = record
-            .get("cwd")
-            .and_then(|c| c.as_str())
-            .filter(|s| !s.is_empty())
-            .map(String::from)
-            .or_else(|| index_entry.map(|e| e.project_path.clone()))
-            .unwrap_or_else(|| "unknown".to_string());
+        let project_path = if record.cwd.is_empty() {
+            index_entry
+                .map(|e| e.project_path.clone())
+                .unwrap_or_else(|| "unknown".to_string())
+        } else {
+            record.cwd.clone()
+        };
 
-        let timestamp = record
-            .get("timestamp")
-            .and_then(|t| t.as_str())
-            .unwrap_or("")
-            .to_string();
+        let timestamp = record.timestamp.clone();
 
         matches.push(DeepMatch {
             session_id: session_id.clone(),
@@ -898,71 +1316,114 @@ fn search_deep_claude(
         *count += 1;
     }
 
+    // rg returns exit code 1 for no matches, which is fine, and a child we
+    // killed at the limit reports only the signal; anything else (e.g. an
+    // invalid regex) is a real failure worth surfacing
+    if let Ok(status) = child.wait()
+        && !killed
+        && !status.success()
+        && status.code() != Some(1)
+    {
+        eprintln!(
+            "WARNING: ripgrep returned unexpected exit code: {:?}",
+            status.code()
+        );
+    }
+
     matches
 }
 
 fn search_deep_openclaw(query: &str, limit: usize, base: &Path) -> Vec<DeepMatch> {
     // Check if ripgrep is available, fall back to pure Rust if not
     if !is_ripgrep_available() {
-        return search_deep_openclaw_rust(query, limit, base);
+        let session_metadata = load_openclaw_session_metadata(base);
+        return search_deep_openclaw_rust(query, limit, base, &session_metadata);
     }
 
-    // Pre-lowercase query terms to avoid repeated allocations
-    let query_terms_lower: Vec<String> =
-        query.split_whitespace().map(|s| s.to_lowercase()).collect();
+    let matcher = QueryMatcher::new(query);
 
-    // Pre-load session metadata before searching
-    let session_metadata = load_openclaw_session_metadata(base);
-
-    let output = Command::new("rg")
+    let child = Command::new("rg")
         .args([
-            "--no-heading",
-            "--line-number",
+            "--json",
             "--ignore-case",
-            "--glob",
-            "*.jsonl",
+            // A named type dispatches faster than a one-off glob
+            "--type-add",
+            "session:*.jsonl",
+            "--type",
+            "session",
             "--glob",
             "!*.deleted.*",
+            "--glob",
+            "!**/subagents/**",
+            "--threads",
+            &rg_thread_count(),
+            // Second pattern matches the session header on line 1 of every
+            // file, so one rg pass yields both metadata and content matches
+            "-e",
+            r#""type"\s*:\s*"session""#,
+            "-e",
             query,
         ])
         .arg(base)
-        .output();
+        .stdout(Stdio::piped())
+        .stderr(Stdio::null())
+        .spawn();
 
-    let output = match output {
-        Ok(o) => o,
+    let mut child = match child {
+        Ok(c) => c,
         Err(e) => {
             // Fallback to Rust if ripgrep fails unexpectedly
             eprintln!("WARNING: Failed to run ripgrep: {e}. Using Rust fallback.");
-            return search_deep_openclaw_rust(query, limit, base);
+            let session_metadata = load_openclaw_session_metadata(base);
+            return search_deep_openclaw_rust(query, limit, base, &session_metadata);
         }
     };
 
-    // rg returns exit code 1 for no matches, which is fine
-    if !output.status.success() && output.status.code() != Some(1) {
-        eprintln!(
-            "WARNING: ripgrep returned unexpected exit code: {:?}",
-            output.status.code()
-        );
-    }
-
-    let stdout = String::from_utf8_lossy(&output.stdout);
+    let Some(stdout) = child.stdout.take() else {
+        let _ = child.wait();
+        let session_metadata = load_openclaw_session_metadata(base);
+        return search_deep_openclaw_rust(query, limit, base, &session_metadata);
+    };
+    let reader = BufReader::new(stdout);
 
     let mut matches = Vec::new();
     let mut seen_sessions: HashMap<String, usize> = HashMap::new();
+    let mut killed = false;
+    // Populated from header events as they stream by; rg emits a file's
+    // matches in line order, so the header always precedes content matches
+    let mut session_metadata: HashMap<String, OpenClawSessionMeta> = HashMap::new();
 
-    for line in stdout.lines() {
+    for line in reader.lines() {
+        // Hit the limit: stop rg instead of draining its remaining output
         if matches.len() >= limit {
+            let _ = child.kill();
+            killed = true;
             break;
         }
 
-        let (path, record) = match parse_rg_line(line) {
+        let Ok(line) = line else {
+            break;
+        };
+
+        let (path, record) = match parse_rg_json_event(&line) {
             Some(r) => r,
             None => continue,
         };
 
-        let record_type = record.get("type").and_then(|t| t.as_str()).unwrap_or("");
+        let record_type = record.record_type.as_str();
+
+        // Session headers carry cwd + start timestamp for the file
+        if record_type == "session" {
+            session_metadata
+                .entry(session_id_from_path(&path))
+                .or_insert_with(|| OpenClawSessionMeta {
+                    cwd: record.cwd.clone(),
+                    timestamp: record.timestamp.clone(),
+                });
+            continue;
+        }
 
-        // Only process message records (skip session headers, tool calls, etc.)
+        // Only process message records (skip tool calls, etc.)
         if record_type != "message" {
             continue;
         }
@@ -981,24 +1442,21 @@ fn search_deep_openclaw(query: &str, limit: usize, base: &Path) -> Vec<DeepMatch
 
         // Lowercase text once, then check all terms
         let text_lower = text.to_lowercase();
-        if !matches_all_terms(&text_lower, &query_terms_lower) {
+        if !matcher.all_terms_in(&text_lower) {
             continue;
         }
 
-        let snippet = get_snippet(&text, query, 80);
+        let snippet = get_snippet(&text, &text_lower, &matcher, 80);
 
         // Get timestamp from message, fall back to session metadata
-        let timestamp = record
-            .get("timestamp")
-            .and_then(|t| t.as_str())
-            .filter(|s| !s.is_empty())
-            .map(String::from)
-            .or_else(|| {
-                session_metadata
-                    .get(&session_id)
-                    .map(|m| m.timestamp.clone())
-            })
-            .unwrap_or_default();
+        let timestamp = if record.timestamp.is_empty() {
+            session_metadata
+                .get(&session_id)
+                .map(|m| m.timestamp.clone())
+                .unwrap_or_default()
+        } else {
+            record.timestamp.clone()
+        };
 
         // Get cwd from session metadata (pre-loaded)
         let project_path = session_metadata
@@ -1020,6 +1478,20 @@ fn search_deep_openclaw(query: &str, limit: usize, base: &Path) -> Vec<DeepMatch
         *count += 1;
     }
 
+    // rg returns exit code 1 for no matches, which is fine, and a child we
+    // killed at the limit reports only the signal; anything else (e.g. an
+    // invalid regex) is a real failure worth surfacing
+    if let Ok(status) = child.wait()
+        && !killed
+        && !status.success()
+        && status.code() != Some(1)
+    {
+        eprintln!(
+            "WARNING: ripgrep returned unexpected exit code: {:?}",
+            status.code()
+        );
+    }
+
     matches
 }
 